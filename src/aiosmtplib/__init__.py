@@ -28,8 +28,9 @@ from .errors import (
     SMTPTimeoutError,
     SMTPConnectResponseError,
 )
+from .pool import SMTPPool, sendmail_parallel
 from .response import SMTPResponse
-from .smtp import SMTP
+from .smtp import SMTP, clear_tls_context_cache
 from .typing import SMTPStatus
 
 
@@ -40,7 +41,10 @@ __license__ = "MIT"
 __copyright__ = "Copyright 2022 Cole Maclean"
 __all__ = (
     "send",
+    "sendmail_parallel",
+    "clear_tls_context_cache",
     "SMTP",
+    "SMTPPool",
     "SMTPResponse",
     "SMTPStatus",
     "SMTPAuthenticationError",
@@ -1,4 +1,4 @@
-from typing import List
+import sys
 
 from aiosmtplib.smtp import SMTP, SMTP_PORT
 
@@ -11,18 +11,10 @@ raw_recipients = input("To: ")  # nosec
 hostname = raw_hostname or "localhost"
 port = int(raw_port) if raw_port else SMTP_PORT
 recipients = raw_recipients.split(",")
-lines: List[str] = []
 
 print("Enter message, end with ^D:")
-while True:
-    try:
-        lines.append(input())  # nosec
-    except EOFError:
-        break
-
-message = "\n".join(lines)
-message_len = len(message.encode("utf-8"))
-print(f"Message length (bytes): {message_len}")
+message = sys.stdin.read().encode("utf-8")
+print(f"Message length (bytes): {len(message)}")
 
 smtp_client = SMTP(hostname=hostname or "localhost", port=port, start_tls=False)
 sendmail_errors, sendmail_response = smtp_client.sendmail_sync(
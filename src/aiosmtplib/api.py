@@ -91,7 +91,8 @@ async def send(
     :raises ValueError: required arguments missing or mutually exclusive options
         provided
     """
-    if not isinstance(message, (email.message.EmailMessage, email.message.Message)):
+    # EmailMessage is a subclass of Message, so one class check covers both
+    if not isinstance(message, email.message.Message):
         if not recipients:
             raise ValueError("Recipients must be provided with raw messages.")
         if not sender:
@@ -120,7 +121,7 @@ async def send(
     )
 
     async with client:
-        if isinstance(message, (email.message.EmailMessage, email.message.Message)):
+        if isinstance(message, email.message.Message):
             result = await client.send_message(
                 message,
                 sender=sender,
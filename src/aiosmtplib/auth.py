@@ -3,6 +3,7 @@ Authentication related methods.
 """
 
 import base64
+import binascii
 import hmac
 from typing import Tuple, Union
 
@@ -11,10 +12,10 @@ __all__ = ("auth_crammd5_verify", "auth_plain_encode", "auth_login_encode")
 
 
 def _ensure_bytes(value: Union[str, bytes]) -> bytes:
-    if isinstance(value, (bytes, bytearray, memoryview)):
-        return value
+    if isinstance(value, str):
+        return value.encode("utf-8")
 
-    return value.encode("utf-8")
+    return value
 
 
 def auth_crammd5_verify(
@@ -31,8 +32,8 @@ def auth_crammd5_verify(
     password_bytes = _ensure_bytes(password)
     decoded_challenge = base64.b64decode(challenge)
 
-    md5_digest = hmac.new(password_bytes, msg=decoded_challenge, digestmod="md5")
-    verification = username_bytes + b" " + md5_digest.hexdigest().encode("ascii")
+    md5_digest = hmac.digest(password_bytes, decoded_challenge, "md5")
+    verification = b" ".join((username_bytes, binascii.b2a_hex(md5_digest)))
     encoded_verification = base64.b64encode(verification)
 
     return encoded_verification
@@ -49,7 +50,7 @@ def auth_plain_encode(
     username_bytes = _ensure_bytes(username)
     password_bytes = _ensure_bytes(password)
 
-    username_and_password = b"\0" + username_bytes + b"\0" + password_bytes
+    username_and_password = b"\0".join((b"", username_bytes, password_bytes))
     encoded = base64.b64encode(username_and_password)
 
     return encoded
@@ -10,6 +10,7 @@ import email.headerregistry
 import email.message
 import email.policy
 import email.utils
+import functools
 import io
 import re
 from typing import Iterable, List, Optional, Union, cast
@@ -27,12 +28,23 @@ __all__ = (
 SPECIALS_REGEX = re.compile(r'[][\\()<>@,:;".]')
 ESCAPES_REGEX = re.compile(r'[\\"]')
 UTF8_CHARSET = email.charset.Charset("utf-8")
+RECIPIENT_HEADERS = ("To", "Cc", "Bcc")
+RESENT_RECIPIENT_HEADERS = ("Resent-To", "Resent-Cc", "Resent-Bcc")
+# Plain ASCII dot-atom addresses, optionally in angle brackets. These parse to
+# themselves, so we can skip the (slow) full parser.
+_ATOM = r"[A-Za-z0-9!#$%&'*+/=?^_`{|}~-]+"
+SIMPLE_ADDRESS_REGEX = re.compile(rf"<?({_ATOM}(?:\.{_ATOM})*@{_ATOM}(?:\.{_ATOM})*)>?")
 
 
+@functools.lru_cache(maxsize=4096)
 def parse_address(address: str) -> str:
     """
     Parse an email address, falling back to the raw string given.
     """
+    simple_match = SIMPLE_ADDRESS_REGEX.fullmatch(address)
+    if simple_match is not None:
+        return simple_match.group(1)
+
     _, parsed_address = email.utils.parseaddr(address)
 
     return parsed_address or address.strip()
@@ -53,10 +65,12 @@ def flatten_message(
     utf8: bool = False,
     cte_type: str = "8bit",
 ) -> bytes:
-    # Make a local copy so we can delete the bcc headers.
+    # Make a local copy so we can delete the bcc headers. Always copy, as the
+    # generator also sets a boundary on multipart messages that lack one.
     message_copy = copy.copy(message)
-    del message_copy["Bcc"]
-    del message_copy["Resent-Bcc"]
+    if "Bcc" in message_copy or "Resent-Bcc" in message_copy:
+        del message_copy["Bcc"]
+        del message_copy["Resent-Bcc"]
 
     with io.BytesIO() as messageio:
         if isinstance(message_copy, email.message.EmailMessage):
@@ -70,7 +84,8 @@ def flatten_message(
         else:
             # Old message class, Compat32 policy. Compat32 cannot use UTF8
             # Mypy can't handle message unions, so just use different vars
-            compat_policy = email.policy.compat32
+            # Use CRLF line endings, so the output is ready to send as is.
+            compat_policy = email.policy.compat32.clone(linesep="\r\n")
             if cte_type != "8bit":
                 compat_policy = compat_policy.clone(cte_type=cte_type)
 
@@ -157,12 +172,15 @@ def extract_recipients(
     if resent_dates is not None and len(resent_dates) > 1:
         raise ValueError("Message has more than one 'Resent-' header block")
     elif resent_dates:
-        recipient_headers = ("Resent-To", "Resent-Cc", "Resent-Bcc")
+        recipient_headers = RESENT_RECIPIENT_HEADERS
     else:
-        recipient_headers = ("To", "Cc", "Bcc")
+        recipient_headers = RECIPIENT_HEADERS
 
     for header in recipient_headers:
-        for recipient in message.get_all(header, failobj=[]):
+        header_values = message.get_all(header)
+        if header_values is None:
+            continue
+        for recipient in header_values:
             recipients.extend(extract_addresses(recipient))
 
     return recipients
@@ -9,7 +9,6 @@ from typing import Dict, List, Tuple
 __all__ = ("parse_esmtp_extensions",)
 
 
-OLDSTYLE_AUTH_REGEX = re.compile(r"auth=(?P<auth>.*)", flags=re.I)
 EXTENSIONS_REGEX = re.compile(r"(?P<ext>[A-Za-z0-9][A-Za-z0-9\-]*) ?")
 
 
@@ -43,6 +42,7 @@ def parse_esmtp_extensions(message: str) -> Tuple[Dict[str, str], List[str]]:
     auth_types: List[str] = []
 
     response_lines = message.split("\n")
+    match_extension = EXTENSIONS_REGEX.match
 
     # ignore the first line
     for line in response_lines[1:]:
@@ -52,16 +52,14 @@ def parse_esmtp_extensions(message: str) -> Tuple[Dict[str, str], List[str]]:
         # 1) Else our SMTP feature parser gets confused.
         # 2) There are some servers that only advertise the auth methods we
         #    support using the old style.
-        auth_match = OLDSTYLE_AUTH_REGEX.match(line)
-        if auth_match is not None:
-            auth_type = auth_match.group("auth")
-            auth_types.append(auth_type.lower().strip())
+        if line[:5].lower() == "auth=":
+            auth_types.append(line[5:].lower().strip())
 
         # RFC 1869 requires a space between ehlo keyword and parameters.
         # It's actually stricter, in that only spaces are allowed between
         # parameters, but were not going to check for that here.  Note
         # that the space isn't present if there are no parameters.
-        extensions = EXTENSIONS_REGEX.match(line)
+        extensions = match_extension(line)
         if extensions is not None:
             extension = extensions.group("ext").lower()
             params = extensions.string[extensions.end("ext") :].strip()
@@ -0,0 +1,372 @@
+"""
+Connection pool, for reusing SMTP connections across messages.
+"""
+
+import asyncio
+import collections
+import contextlib
+import email.message
+from typing import (
+    Any,
+    AsyncGenerator,
+    Deque,
+    Dict,
+    Iterable,
+    List,
+    Literal,
+    Mapping,
+    Optional,
+    Sequence,
+    Tuple,
+    Type,
+    Union,
+)
+
+from .errors import SMTPException, SMTPServerDisconnected, SMTPTimeoutError
+from .response import SMTPResponse
+from .smtp import SMTP
+from .typing import Default
+
+
+__all__ = ("SMTPPool", "sendmail_parallel")
+
+NOOP_TIMEOUT = 5.0
+
+
+class SMTPPool:
+    """
+    A pool of connected :class:`.SMTP` clients.
+
+    Opening a connection to the server (including the TLS handshake and login,
+    if required) can take longer than sending the message itself. The pool
+    keeps connections open after use, so that they can be reused for later
+    messages.
+
+    Basic usage:
+
+        >>> event_loop = asyncio.get_event_loop()
+        >>> pool = aiosmtplib.SMTPPool(hostname="127.0.0.1", port=1025)
+        >>> send = pool.sendmail("root@localhost", ["somebody@localhost"], "Hi")
+        >>> event_loop.run_until_complete(send)
+        ({}, 'OK')
+        >>> event_loop.run_until_complete(pool.close())
+
+    Keyword arguments other than the pool options are passed to :class:`.SMTP`
+    when opening new connections.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_connections: int = 5,
+        max_messages_per_connection: int = 100,
+        idle_check_after: Optional[float] = 120.0,
+        **kwargs: Any,
+    ) -> None:
+        """
+        :keyword max_connections: Maximum number of connections open at once.
+            Defaults to 5.
+        :keyword max_messages_per_connection: Connections are closed and replaced
+            after being used this many times. Defaults to 100.
+        :keyword idle_check_after: If the server hasn't responded on a connection
+            for longer than this (in seconds), send a NOOP to check that it is
+            still alive before reusing it. If ``None``, connections are never
+            checked. Defaults to 120.
+
+        :raises ValueError: invalid options provided
+        """
+        if max_connections < 1:
+            raise ValueError("max_connections must be at least 1")
+        if max_messages_per_connection < 1:
+            raise ValueError("max_messages_per_connection must be at least 1")
+
+        # Validate the client options now, rather than on first use.
+        SMTP(**kwargs)
+
+        self.max_connections = max_connections
+        self.max_messages_per_connection = max_messages_per_connection
+        self.idle_check_after = idle_check_after
+        self._smtp_kwargs = kwargs
+
+        self._idle: Deque[SMTP] = collections.deque()
+        self._use_counts: Dict[SMTP, int] = {}
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    async def __aenter__(self) -> "SMTPPool":
+        return self
+
+    async def __aexit__(
+        self, exc_type: Type[BaseException], exc: BaseException, traceback: Any
+    ) -> None:
+        await self.close()
+
+    @property
+    def idle_connections(self) -> int:
+        """
+        The number of open connections not currently in use.
+        """
+        return len(self._idle)
+
+    @contextlib.asynccontextmanager
+    async def acquire(self) -> AsyncGenerator[SMTP, None]:
+        """
+        Lease a connected :class:`.SMTP` client from the pool, opening a new
+        connection if no idle ones are available. Waits if ``max_connections``
+        are already in use.
+
+        The client is returned to the pool on exit. If an exception was raised,
+        the server envelope is reset before the client is reused. After a
+        timeout or disconnect, the client is closed instead.
+
+        Usage::
+
+            async with pool.acquire() as client:
+                await client.sendmail(sender, recipients, message)
+        """
+        async with self._lease(reset_on_error=True) as client:
+            yield client
+
+    @contextlib.asynccontextmanager
+    async def _lease(self, reset_on_error: bool) -> AsyncGenerator[SMTP, None]:
+        """
+        Lease a client, as for :meth:`acquire`. If ``reset_on_error`` is
+        false, the caller is responsible for resetting the envelope after an
+        error (as :meth:`.SMTP.sendmail` already does).
+        """
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_connections)
+
+        async with self._semaphore:
+            client = await self._get_client()
+            try:
+                yield client
+            except (SMTPTimeoutError, SMTPServerDisconnected):
+                # A late reply to the timed out command would be read as the
+                # response to the next one, so the connection can't be reused.
+                self._discard(client)
+                raise
+            except Exception:
+                await self._release(client, reset=reset_on_error)
+                raise
+            except BaseException:
+                self._discard(client)
+                raise
+            else:
+                await self._release(client)
+
+    async def close(self) -> None:
+        """
+        Close all idle connections.
+        """
+        while self._idle:
+            client = self._idle.popleft()
+            await self._quit(client)
+
+    async def sendmail(
+        self,
+        sender: str,
+        recipients: Union[str, Sequence[str]],
+        message: Union[str, bytes],
+        /,
+        *,
+        mail_options: Optional[Iterable[str]] = None,
+        rcpt_options: Optional[Iterable[str]] = None,
+        timeout: Optional[Union[float, Literal[Default.token]]] = Default.token,
+    ) -> Tuple[Dict[str, SMTPResponse], str]:
+        """
+        Send a raw message using a pooled connection.
+        Arguments are as for :meth:`.SMTP.sendmail`.
+        """
+        async with self._lease(reset_on_error=False) as client:
+            return await client.sendmail(
+                sender,
+                recipients,
+                message,
+                mail_options=mail_options,
+                rcpt_options=rcpt_options,
+                timeout=timeout,
+            )
+
+    async def send_message(
+        self,
+        message: Union[email.message.EmailMessage, email.message.Message],
+        /,
+        *,
+        sender: Optional[str] = None,
+        recipients: Optional[Union[str, Sequence[str]]] = None,
+        mail_options: Optional[Iterable[str]] = None,
+        rcpt_options: Optional[Iterable[str]] = None,
+        timeout: Optional[Union[float, Literal[Default.token]]] = Default.token,
+    ) -> Tuple[Dict[str, SMTPResponse], str]:
+        """
+        Send an :py:class:`email.message.EmailMessage` object using a pooled
+        connection. Arguments are as for :meth:`.SMTP.send_message`.
+        """
+        async with self._lease(reset_on_error=False) as client:
+            return await client.send_message(
+                message,
+                sender=sender,
+                recipients=recipients,
+                mail_options=mail_options,
+                rcpt_options=rcpt_options,
+                timeout=timeout,
+            )
+
+    async def send_messages(
+        self,
+        messages: Iterable[Union[email.message.EmailMessage, email.message.Message]],
+        /,
+        *,
+        mail_options: Optional[Iterable[str]] = None,
+        rcpt_options: Optional[Iterable[str]] = None,
+        timeout: Optional[Union[float, Literal[Default.token]]] = Default.token,
+    ) -> List[Union[Tuple[Dict[str, SMTPResponse], str], SMTPException, ValueError]]:
+        """
+        Send several :py:class:`email.message.EmailMessage` objects in turn,
+        reusing pooled connections. Arguments are as for
+        :meth:`.SMTP.send_message`, and apply to every message.
+
+        An error sending one message doesn't stop the rest from being sent.
+
+        :returns: A list with an entry for each message, in order. Each entry
+            is the result of :meth:`.SMTP.send_message`, or the
+            :exc:`.SMTPException` or :exc:`ValueError` (e.g. for a message
+            with no sender or recipients) raised by it.
+        """
+        results: List[
+            Union[Tuple[Dict[str, SMTPResponse], str], SMTPException, ValueError]
+        ] = []
+        for message in messages:
+            try:
+                result = await self.send_message(
+                    message,
+                    mail_options=mail_options,
+                    rcpt_options=rcpt_options,
+                    timeout=timeout,
+                )
+            except (SMTPException, ValueError) as exc:
+                results.append(exc)
+            else:
+                results.append(result)
+
+        return results
+
+    async def _get_client(self) -> SMTP:
+        """
+        Return the most recently used idle connection that is still alive,
+        or open a new one.
+        """
+        while self._idle:
+            client = self._idle.pop()
+            if await self._is_alive(client):
+                return client
+
+            self._discard(client)
+
+        client = SMTP(**self._smtp_kwargs)
+        await client.connect()
+        self._use_counts[client] = 0
+
+        return client
+
+    async def _is_alive(self, client: SMTP) -> bool:
+        if client.protocol is None or not client.is_connected:
+            return False
+
+        last_response_time = client.protocol.last_response_time
+        if self.idle_check_after is not None and last_response_time is not None:
+            idle_time = asyncio.get_running_loop().time() - last_response_time
+            if idle_time > self.idle_check_after:
+                # Half open connections look connected until we try to use them.
+                try:
+                    await client.noop(timeout=NOOP_TIMEOUT)
+                except SMTPException:
+                    return False
+
+        return True
+
+    async def _release(self, client: SMTP, reset: bool = False) -> None:
+        self._use_counts[client] += 1
+
+        if reset and client.is_connected:
+            try:
+                await client.rset()
+            except SMTPException:
+                self._discard(client)
+                return
+
+        if not client.is_connected:
+            self._discard(client)
+        elif self._use_counts[client] >= self.max_messages_per_connection:
+            await self._quit(client)
+        else:
+            self._idle.append(client)
+
+    async def _quit(self, client: SMTP) -> None:
+        try:
+            await client.quit()
+        except SMTPException:
+            pass
+        finally:
+            self._discard(client)
+
+    def _discard(self, client: SMTP) -> None:
+        client.close()
+        self._use_counts.pop(client, None)
+
+
+async def sendmail_parallel(
+    sender: str,
+    recipients_by_host: Mapping[str, Sequence[str]],
+    message: Union[str, bytes],
+    /,
+    *,
+    pools: Mapping[str, SMTPPool],
+    mail_options: Optional[Iterable[str]] = None,
+    rcpt_options: Optional[Iterable[str]] = None,
+    timeout: Optional[Union[float, Literal[Default.token]]] = Default.token,
+) -> Dict[str, Union[Tuple[Dict[str, SMTPResponse], str], BaseException]]:
+    """
+    Send the same raw message to recipients on several servers at once.
+
+    Each connection handles one transaction at a time, but there is no need to
+    wait for one server before sending to the next. Recipients are given by
+    key, and sent using the pool of the same key in ``pools`` (usually keyed by
+    MX host), concurrently.
+
+    :keyword pools: The :class:`SMTPPool` to use for each key in
+        ``recipients_by_host``.
+
+    :returns: A dict of results, with the same keys as ``recipients_by_host``.
+        Each value is the result of :meth:`SMTPPool.sendmail`, or the
+        exception raised by it.
+
+    :raises KeyError: no pool given for a key in ``recipients_by_host``
+    :raises UnicodeEncodeError: a string message contains non-ASCII characters
+    """
+    # Check up front, so that no send coroutines are left unawaited
+    missing = set(recipients_by_host) - set(pools)
+    if missing:
+        raise KeyError(f"No pool given for: {', '.join(sorted(missing))}")
+
+    # Encode once here, rather than separately for every host
+    if isinstance(message, str):
+        message = message.encode("ascii")
+
+    hosts = list(recipients_by_host)
+    sends = [
+        pools[host].sendmail(
+            sender,
+            recipients_by_host[host],
+            message,
+            mail_options=mail_options,
+            rcpt_options=rcpt_options,
+            timeout=timeout,
+        )
+        for host in hosts
+    ]
+    results: List[
+        Union[Tuple[Dict[str, SMTPResponse], str], BaseException]
+    ] = await asyncio.gather(*sends, return_exceptions=True)
+
+    return dict(zip(hosts, results))
@@ -6,10 +6,14 @@ Implements SMTP, ESMTP & Auth methods.
 
 import asyncio
 import email.message
+import functools
+import os
 import socket
 import ssl
 from typing import (
     Any,
+    Awaitable,
+    Callable,
     Dict,
     Iterable,
     List,
@@ -33,6 +37,7 @@ from .errors import (
     SMTPAuthenticationError,
     SMTPConnectError,
     SMTPConnectTimeoutError,
+    SMTPDataError,
     SMTPException,
     SMTPHeloError,
     SMTPNotSupported,
@@ -47,10 +52,25 @@ from .errors import (
 from .esmtp import parse_esmtp_extensions
 from .protocol import SMTPProtocol
 from .response import SMTPResponse
+from .status import (
+    AUTH_CONTINUE_CODE,
+    AUTH_SUCCESSFUL_CODE,
+    CLOSING_CODE,
+    COMPLETED_CODE,
+    DOMAIN_UNAVAILABLE_CODE,
+    READY_CODE,
+    WILL_FORWARD_CODE,
+)
 from .typing import Default, SMTPStatus, SocketPathType
 
 
-__all__ = ("SMTP", "SMTP_PORT", "SMTP_TLS_PORT", "SMTP_STARTTLS_PORT")
+__all__ = (
+    "SMTP",
+    "SMTP_PORT",
+    "SMTP_TLS_PORT",
+    "SMTP_STARTTLS_PORT",
+    "clear_tls_context_cache",
+)
 
 SMTP_PORT = 25
 SMTP_TLS_PORT = 465
@@ -58,6 +78,97 @@ SMTP_STARTTLS_PORT = 587
 DEFAULT_TIMEOUT = 60
 
 
+def _encode_options(options: Iterable[str]) -> Tuple[bytes, ...]:
+    """
+    Encode ESMTP options as a single command argument, in one pass.
+    """
+    options_str = " ".join(options)
+    return (options_str.encode("ascii"),) if options_str else ()
+
+
+@functools.lru_cache(maxsize=1)
+def _get_fqdn() -> str:
+    """
+    Look up the local hostname once per process, as :func:`socket.getfqdn`
+    can block on DNS.
+    """
+    return socket.getfqdn()
+
+
+# Default TLS contexts, keyed by the options used to build them, along with
+# the modification times of the files loaded. Most processes only ever use a
+# handful of option combinations; the oldest entry is dropped past the limit.
+TLS_CONTEXT_CACHE_SIZE = 32
+_tls_context_cache: Dict[
+    Tuple[bool, Optional[str], Optional[str], Optional[str]],
+    Tuple[Tuple[Optional[int], ...], ssl.SSLContext],
+] = {}
+
+
+def clear_tls_context_cache() -> None:
+    """
+    Discard the TLS contexts reused between connections, so that new
+    connections load certificates again.
+
+    Changes to the certificate files given as client options are picked up
+    automatically, but changes to the system CA certificates are not. Call
+    this after updating them.
+    """
+    _tls_context_cache.clear()
+
+
+def _get_mtime(path: Optional[str]) -> Optional[int]:
+    if path is None:
+        return None
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+def _create_tls_context(
+    validate_certs: bool,
+    cert_bundle: Optional[str],
+    client_cert: Optional[str],
+    client_key: Optional[str],
+) -> ssl.SSLContext:
+    """
+    Build an SSLContext for a client socket, or reuse one built earlier with
+    the same options. Loading the default CA certificates is slow, and
+    contexts can safely be shared between connections.
+
+    Contexts are rebuilt if any of the files given have changed since. Use
+    :func:`clear_tls_context_cache` to pick up changes to the system CA
+    certificates.
+    """
+    key = (validate_certs, cert_bundle, client_cert, client_key)
+    mtimes = (_get_mtime(cert_bundle), _get_mtime(client_cert), _get_mtime(client_key))
+    cached = _tls_context_cache.get(key)
+    if cached is not None and cached[0] == mtimes:
+        return cached[1]
+
+    # SERVER_AUTH is what we want for a client side socket
+    context = ssl.create_default_context(ssl.Purpose.SERVER_AUTH)
+    context.check_hostname = validate_certs
+    if validate_certs:
+        context.verify_mode = ssl.CERT_REQUIRED
+    else:
+        context.verify_mode = ssl.CERT_NONE
+
+    if cert_bundle is not None:
+        context.load_verify_locations(cafile=cert_bundle)
+
+    if client_cert is not None:
+        context.load_cert_chain(client_cert, keyfile=client_key)
+
+    _tls_context_cache.pop(key, None)
+    if len(_tls_context_cache) >= TLS_CONTEXT_CACHE_SIZE:
+        del _tls_context_cache[next(iter(_tls_context_cache))]
+    _tls_context_cache[key] = (mtimes, context)
+
+    return context
+
+
 class SMTP:
     """
     Main SMTP client class.
@@ -188,14 +299,15 @@ class SMTP:
     async def __aexit__(
         self, exc_type: Type[BaseException], exc: BaseException, traceback: Any
     ) -> None:
-        if isinstance(exc, (ConnectionError, TimeoutError)):
+        if isinstance(exc, (ConnectionError, TimeoutError)) or not self.is_connected:
             self.close()
             return
 
         try:
             await self.quit()
         except (SMTPServerDisconnected, SMTPResponseException, SMTPTimeoutError):
-            pass
+            # Don't leave the connection open if the server didn't respond
+            self.close()
 
     @property
     def is_connected(self) -> bool:
@@ -208,10 +320,11 @@ class SMTP:
     def local_hostname(self) -> str:
         """
         Get the system hostname to be sent to the SMTP server.
-        Simply caches the result of :func:`socket.getfqdn`.
+        Simply caches the result of :func:`socket.getfqdn`, which is looked
+        up once and shared by all clients.
         """
         if self._local_hostname is None:
-            self._local_hostname = socket.getfqdn()
+            self._local_hostname = _get_fqdn()
 
         return self._local_hostname
 
@@ -236,7 +349,7 @@ class SMTP:
         """
         Check if we've already received a response to an EHLO or HELO command.
         """
-        return self.last_ehlo_response is None and self.last_helo_response is None
+        return self._last_ehlo_response is None and self.last_helo_response is None
 
     @property
     def supported_auth_methods(self) -> List[str]:
@@ -512,6 +625,14 @@ class SMTP:
         self.protocol = protocol
         self.transport = transport
 
+        # asyncio already disables Nagle's algorithm on TCP connections; also
+        # have the kernel probe idle connections, so dead peers are noticed.
+        # Sockets passed in by the user are left as configured.
+        if self.sock is None and self.socket_path is None:
+            transport_socket = transport.get_extra_info("socket")
+            if transport_socket is not None:
+                transport_socket.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+
         try:
             response = await protocol.read_response(timeout=timeout)
         except SMTPServerDisconnected as exc:
@@ -523,7 +644,7 @@ class SMTP:
                 "Timed out waiting for server ready message"
             ) from exc
 
-        if response.code != SMTPStatus.ready:
+        if response.code != READY_CODE:
             raise SMTPConnectResponseError(response.code, response.message)
 
         return response
@@ -567,41 +688,63 @@ class SMTP:
 
         :raises SMTPServerDisconnected: connection lost
         """
-        if self.protocol is None:
+        protocol = self.protocol
+        if protocol is None:
             raise SMTPServerDisconnected("Server not connected")
 
-        response = await self.protocol.execute_command(
-            *args, timeout=self.timeout if timeout is Default.token else timeout
-        )
+        if timeout is Default.token:
+            timeout = self.timeout
+
+        response = await protocol.execute_command(*args, timeout=timeout)
 
         # If the server is unavailable, be nice and close the connection
-        if response.code == SMTPStatus.domain_unavailable:
+        if response.code == DOMAIN_UNAVAILABLE_CODE:
             self.close()
 
         return response
 
+    async def execute_commands(
+        self,
+        *commands: Sequence[bytes],
+        timeout: Optional[Union[float, Literal[Default.token]]] = Default.token,
+    ) -> List[SMTPResponse]:
+        """
+        Send several commands in a single write, and return a response for each
+        (RFC 2920 PIPELINING). Each command is a sequence of args, as would be
+        passed to :meth:`execute_command`.
+
+        Check that the server supports the ``PIPELINING`` extension first.
+
+        :raises SMTPServerDisconnected: connection lost
+        """
+        protocol = self.protocol
+        if protocol is None:
+            raise SMTPServerDisconnected("Server not connected")
+
+        if timeout is Default.token:
+            timeout = self.timeout
+
+        responses = await protocol.execute_commands(*commands, timeout=timeout)
+
+        # If the server is unavailable, be nice and close the connection
+        if any(response.code == DOMAIN_UNAVAILABLE_CODE for response in responses):
+            self.close()
+
+        return responses
+
     def _get_tls_context(self) -> ssl.SSLContext:
         """
         Build an SSLContext object from the options we've been given.
         """
         if self.tls_context is not None:
-            context = self.tls_context
-        else:
-            # SERVER_AUTH is what we want for a client side socket
-            context = ssl.create_default_context(ssl.Purpose.SERVER_AUTH)
-            context.check_hostname = bool(self.validate_certs)
-            if self.validate_certs:
-                context.verify_mode = ssl.CERT_REQUIRED
-            else:
-                context.verify_mode = ssl.CERT_NONE
-
-            if self.cert_bundle is not None:
-                context.load_verify_locations(cafile=self.cert_bundle)
+            return self.tls_context
 
-            if self.client_cert is not None:
-                context.load_cert_chain(self.client_cert, keyfile=self.client_key)
-
-        return context
+        return _create_tls_context(
+            bool(self.validate_certs),
+            self.cert_bundle,
+            self.client_cert,
+            self.client_key,
+        )
 
     def close(self) -> None:
         """
@@ -659,7 +802,7 @@ class SMTP:
             b"HELO", (hostname or self.local_hostname).encode("ascii"), timeout=timeout
         )
 
-        if response.code != SMTPStatus.completed:
+        if response.code != COMPLETED_CODE:
             raise SMTPHeloError(response.code, response.message)
 
         return response
@@ -696,7 +839,7 @@ class SMTP:
         await self._ehlo_or_helo_if_needed()
 
         response = await self.execute_command(b"RSET", timeout=timeout)
-        if response.code != SMTPStatus.completed:
+        if response.code != COMPLETED_CODE:
             raise SMTPResponseException(response.code, response.message)
 
         return response
@@ -712,7 +855,7 @@ class SMTP:
         await self._ehlo_or_helo_if_needed()
 
         response = await self.execute_command(b"NOOP", timeout=timeout)
-        if response.code != SMTPStatus.completed:
+        if response.code != COMPLETED_CODE:
             raise SMTPResponseException(response.code, response.message)
 
         return response
@@ -734,7 +877,7 @@ class SMTP:
         await self._ehlo_or_helo_if_needed()
 
         if options is None:
-            options = []
+            options = ()
 
         parsed_address = parse_address(address)
         if any(option.lower() == "smtputf8" for option in options):
@@ -743,7 +886,7 @@ class SMTP:
             addr_bytes = parsed_address.encode("utf-8")
         else:
             addr_bytes = parsed_address.encode("ascii")
-        options_bytes = [option.encode("ascii") for option in options]
+        options_bytes = _encode_options(options)
 
         response = await self.execute_command(
             b"VRFY", addr_bytes, *options_bytes, timeout=timeout
@@ -775,7 +918,7 @@ class SMTP:
         await self._ehlo_or_helo_if_needed()
 
         if options is None:
-            options = []
+            options = ()
 
         parsed_address = parse_address(address)
         if any(option.lower() == "smtputf8" for option in options):
@@ -784,13 +927,13 @@ class SMTP:
             addr_bytes = parsed_address.encode("utf-8")
         else:
             addr_bytes = parsed_address.encode("ascii")
-        options_bytes = [option.encode("ascii") for option in options]
+        options_bytes = _encode_options(options)
 
         response = await self.execute_command(
             b"EXPN", addr_bytes, *options_bytes, timeout=timeout
         )
 
-        if response.code != SMTPStatus.completed:
+        if response.code != COMPLETED_CODE:
             raise SMTPResponseException(response.code, response.message)
 
         return response
@@ -805,7 +948,7 @@ class SMTP:
         :raises SMTPResponseException: on unexpected server response code
         """
         response = await self.execute_command(b"QUIT", timeout=timeout)
-        if response.code != SMTPStatus.closing:
+        if response.code != CLOSING_CODE:
             raise SMTPResponseException(response.code, response.message)
 
         self.close()
@@ -830,17 +973,17 @@ class SMTP:
         await self._ehlo_or_helo_if_needed()
 
         if options is None:
-            options = []
+            options = ()
 
         quoted_sender = quote_address(sender)
         addr_bytes = quoted_sender.encode(encoding)
-        options_bytes = [option.encode("ascii") for option in options]
+        options_bytes = _encode_options(options)
 
         response = await self.execute_command(
             b"MAIL", b"FROM:" + addr_bytes, *options_bytes, timeout=timeout
         )
 
-        if response.code != SMTPStatus.completed:
+        if response.code != COMPLETED_CODE:
             raise SMTPSenderRefused(response.code, response.message, sender)
 
         return response
@@ -864,17 +1007,17 @@ class SMTP:
         await self._ehlo_or_helo_if_needed()
 
         if options is None:
-            options = []
+            options = ()
 
         quoted_recipient = quote_address(recipient)
         addr_bytes = quoted_recipient.encode(encoding)
-        options_bytes = [option.encode("ascii") for option in options]
+        options_bytes = _encode_options(options)
 
         response = await self.execute_command(
             b"RCPT", b"TO:" + addr_bytes, *options_bytes, timeout=timeout
         )
 
-        if response.code not in (SMTPStatus.completed, SMTPStatus.will_forward):
+        if response.code not in (COMPLETED_CODE, WILL_FORWARD_CODE):
             raise SMTPRecipientRefused(response.code, response.message, recipient)
 
         return response
@@ -930,7 +1073,7 @@ class SMTP:
         )
         self.last_ehlo_response = response
 
-        if response.code != SMTPStatus.completed:
+        if response.code != COMPLETED_CODE:
             raise SMTPHeloError(response.code, response.message)
 
         return response
@@ -1037,6 +1180,9 @@ class SMTP:
         # The client MUST discard any knowledge obtained from the server, such
         # as the list of SMTP service extensions, which was not obtained from
         # the TLS negotiation itself.
+        # The new EHLO is sent lazily, before the next command that needs it.
+        # It can't be pipelined with MAIL; per RFC 2920 part 3.1, EHLO may
+        # only appear as the last command in a group.
         self._reset_server_state()
 
         return response
@@ -1069,16 +1215,21 @@ class SMTP:
                 "The SMTP AUTH extension is not supported by this server."
             )
 
-        response: Optional[SMTPResponse] = None
-        exception: Optional[SMTPAuthenticationError] = None
+        # Look up all handlers before sending anything, so a missing one fails
+        # fast rather than after some methods have been tried.
+        auth_methods: List[Callable[..., Awaitable[SMTPResponse]]] = []
         for auth_name in self.supported_auth_methods:
             method_name = f"auth_{auth_name.replace('-', '')}"
             try:
-                auth_method = getattr(self, method_name)
+                auth_methods.append(getattr(self, method_name))
             except AttributeError as err:
                 raise RuntimeError(
                     f"Missing handler for auth method {auth_name}"
                 ) from err
+
+        response: Optional[SMTPResponse] = None
+        exception: Optional[SMTPAuthenticationError] = None
+        for auth_method in auth_methods:
             try:
                 response = await auth_method(username, password, timeout=timeout)
             except SMTPAuthenticationError as exc:
@@ -1116,7 +1267,7 @@ class SMTP:
             b"AUTH", b"CRAM-MD5", timeout=timeout
         )
 
-        if initial_response.code != SMTPStatus.auth_continue:
+        if initial_response.code != AUTH_CONTINUE_CODE:
             raise SMTPAuthenticationError(
                 initial_response.code, initial_response.message
             )
@@ -1126,7 +1277,7 @@ class SMTP:
         )
         response = await self.execute_command(verification_bytes)
 
-        if response.code != SMTPStatus.auth_successful:
+        if response.code != AUTH_SUCCESSFUL_CODE:
             raise SMTPAuthenticationError(response.code, response.message)
 
         return response
@@ -1155,7 +1306,7 @@ class SMTP:
             b"AUTH", b"PLAIN", encoded, timeout=timeout
         )
 
-        if response.code != SMTPStatus.auth_successful:
+        if response.code != AUTH_SUCCESSFUL_CODE:
             raise SMTPAuthenticationError(response.code, response.message)
 
         return response
@@ -1196,14 +1347,14 @@ class SMTP:
             b"AUTH", b"LOGIN", encoded_username, timeout=timeout
         )
 
-        if initial_response.code != SMTPStatus.auth_continue:
+        if initial_response.code != AUTH_CONTINUE_CODE:
             raise SMTPAuthenticationError(
                 initial_response.code, initial_response.message
             )
 
         response = await self.execute_command(encoded_password, timeout=timeout)
 
-        if response.code != SMTPStatus.auth_successful:
+        if response.code != AUTH_SUCCESSFUL_CODE:
             raise SMTPAuthenticationError(response.code, response.message)
 
         return response
@@ -1239,6 +1390,10 @@ class SMTP:
         If there has been no previous HELO or EHLO command this session, this
         method tries EHLO first.
 
+        If the server supports the PIPELINING extension, the MAIL, RCPT and
+        DATA commands are sent together, rather than waiting for a response to
+        each in turn.
+
         This method will return normally if the mail is accepted for at least
         one recipient.  It returns a tuple consisting of:
 
@@ -1285,14 +1440,12 @@ class SMTP:
         """
         if isinstance(recipients, str):
             recipients = [recipients]
-        if mail_options is None:
-            mail_options = []
-        else:
-            mail_options = list(mail_options)
-        if rcpt_options is None:
-            rcpt_options = []
-        else:
-            rcpt_options = list(rcpt_options)
+        # Encode once up front, so the SIZE option is a byte count, and any
+        # encoding error is raised before we start the transaction.
+        if isinstance(message, str):
+            message = message.encode("ascii")
+        mail_options = () if mail_options is None else tuple(mail_options)
+        rcpt_options = () if rcpt_options is None else tuple(rcpt_options)
 
         if any(option.lower() == "smtputf8" for option in mail_options):
             mailbox_encoding = "utf-8"
@@ -1312,19 +1465,33 @@ class SMTP:
             if self.supports_extension("size"):
                 message_len = len(message)
                 size_option = f"size={message_len}"
-                mail_options.insert(0, size_option)
+                mail_options = (size_option, *mail_options)
 
             try:
-                await self.mail(
-                    sender,
-                    options=mail_options,
-                    encoding=mailbox_encoding,
-                    timeout=timeout,
-                )
-                recipient_errors = await self._send_recipients(
-                    recipients, rcpt_options, encoding=mailbox_encoding, timeout=timeout
-                )
-                response = await self.data(message, timeout=timeout)
+                if self.supports_extension("pipelining"):
+                    recipient_errors, response = await self._send_pipelined(
+                        sender,
+                        recipients,
+                        message,
+                        mail_options,
+                        rcpt_options,
+                        encoding=mailbox_encoding,
+                        timeout=timeout,
+                    )
+                else:
+                    await self.mail(
+                        sender,
+                        options=mail_options,
+                        encoding=mailbox_encoding,
+                        timeout=timeout,
+                    )
+                    recipient_errors = await self._send_recipients(
+                        recipients,
+                        rcpt_options,
+                        encoding=mailbox_encoding,
+                        timeout=timeout,
+                    )
+                    response = await self.data(message, timeout=timeout)
             except (SMTPResponseException, SMTPRecipientsRefused) as exc:
                 # If we got an error, reset the envelope.
                 try:
@@ -1367,6 +1534,79 @@ class SMTP:
 
         return formatted_errors
 
+    async def _send_pipelined(
+        self,
+        sender: str,
+        recipients: Sequence[str],
+        message: bytes,
+        mail_options: Iterable[str],
+        rcpt_options: Iterable[str],
+        encoding: str = "ascii",
+        timeout: Optional[Union[float, Literal[Default.token]]] = Default.token,
+    ) -> Tuple[Dict[str, SMTPResponse], SMTPResponse]:
+        """
+        Send the MAIL, RCPT and DATA commands in a single write, rather than
+        waiting for a response to each (RFC 2920 PIPELINING). Used as part of
+        :meth:`.sendmail`.
+        """
+        protocol = self.protocol
+        if protocol is None:
+            raise SMTPServerDisconnected("Server not connected")
+
+        if timeout is Default.token:
+            timeout = self.timeout
+
+        mail_command = (
+            b"MAIL",
+            b"FROM:" + quote_address(sender).encode(encoding),
+            *_encode_options(mail_options),
+        )
+        rcpt_options_bytes = _encode_options(rcpt_options)
+        rcpt_commands = [
+            (
+                b"RCPT",
+                b"TO:" + quote_address(recipient).encode(encoding),
+                *rcpt_options_bytes,
+            )
+            for recipient in recipients
+        ]
+
+        (
+            mail_response,
+            rcpt_responses,
+            data_response,
+        ) = await protocol.execute_pipelined_data_command(
+            message, mail_command, rcpt_commands, timeout=timeout
+        )
+
+        # If the server is unavailable, be nice and close the connection
+        if any(
+            response.code == DOMAIN_UNAVAILABLE_CODE
+            for response in (mail_response, *rcpt_responses, data_response)
+        ):
+            self.close()
+
+        if mail_response.code != COMPLETED_CODE:
+            raise SMTPSenderRefused(mail_response.code, mail_response.message, sender)
+
+        recipient_errors = [
+            SMTPRecipientRefused(response.code, response.message, recipient)
+            for recipient, response in zip(recipients, rcpt_responses)
+            if response.code not in (COMPLETED_CODE, WILL_FORWARD_CODE)
+        ]
+        if len(recipient_errors) == len(recipients):
+            raise SMTPRecipientsRefused(recipient_errors)
+
+        if data_response.code != COMPLETED_CODE:
+            raise SMTPDataError(data_response.code, data_response.message)
+
+        formatted_errors = {
+            err.recipient: SMTPResponse(err.code, err.message)
+            for err in recipient_errors
+        }
+
+        return formatted_errors, data_response
+
     async def send_message(
         self,
         message: Union[email.message.EmailMessage, email.message.Message],
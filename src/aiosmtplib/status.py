@@ -3,3 +3,14 @@ from .typing import SMTPStatus
 
 # alias SMTPStatus for backwards compatibility
 __all__ = ("SMTPStatus",)
+
+# Plain ints for the status codes checked on every command, to avoid enum
+# member lookups on the hot path.
+READY_CODE = int(SMTPStatus.ready)
+CLOSING_CODE = int(SMTPStatus.closing)
+AUTH_SUCCESSFUL_CODE = int(SMTPStatus.auth_successful)
+COMPLETED_CODE = int(SMTPStatus.completed)
+WILL_FORWARD_CODE = int(SMTPStatus.will_forward)
+AUTH_CONTINUE_CODE = int(SMTPStatus.auth_continue)
+START_INPUT_CODE = int(SMTPStatus.start_input)
+DOMAIN_UNAVAILABLE_CODE = int(SMTPStatus.domain_unavailable)
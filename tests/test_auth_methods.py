@@ -40,6 +40,18 @@ async def test_login_unknown_method_raises_error(mock_auth: DummySMTPAuth) -> No
         await mock_auth.login("username", "bogus")
 
 
+async def test_login_unknown_method_raises_error_before_sending(
+    mock_auth: DummySMTPAuth,
+) -> None:
+    mock_auth.AUTH_METHODS = ("plain", "fakeauth")
+    mock_auth.server_auth_methods = ["plain", "fakeauth"]
+
+    with pytest.raises(RuntimeError):
+        await mock_auth.login("username", "bogus")
+
+    assert not mock_auth.received_commands
+
+
 async def test_login_without_method_raises_error(mock_auth: DummySMTPAuth) -> None:
     mock_auth.server_auth_methods = []
 
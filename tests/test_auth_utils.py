@@ -96,3 +96,46 @@ def test_auth_login_encode_str(
         base64.b64encode(username_bytes),
         base64.b64encode(password_bytes),
     )
+
+
+@given(binary(), binary(), binary())
+def test_auth_crammd5_verify_bytes_like(
+    username: bytes,
+    password: bytes,
+    challenge: bytes,
+) -> None:
+    encoded_challenge = base64.b64encode(challenge)
+    expected = auth_crammd5_verify(username, password, encoded_challenge)
+
+    assert (
+        auth_crammd5_verify(bytearray(username), bytearray(password), encoded_challenge)
+        == expected
+    )
+    assert (
+        auth_crammd5_verify(
+            memoryview(username), memoryview(password), encoded_challenge
+        )
+        == expected
+    )
+
+
+@given(binary(), binary())
+def test_auth_plain_encode_bytes_like(
+    username: bytes,
+    password: bytes,
+) -> None:
+    expected = auth_plain_encode(username, password)
+
+    assert auth_plain_encode(bytearray(username), bytearray(password)) == expected
+    assert auth_plain_encode(memoryview(username), memoryview(password)) == expected
+
+
+@given(binary(), binary())
+def test_auth_login_encode_bytes_like(
+    username: bytes,
+    password: bytes,
+) -> None:
+    expected = auth_login_encode(username, password)
+
+    assert auth_login_encode(bytearray(username), bytearray(password)) == expected
+    assert auth_login_encode(memoryview(username), memoryview(password)) == expected
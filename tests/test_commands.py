@@ -206,6 +206,25 @@ async def test_ehlo_or_helo_if_needed_disconnect_after_ehlo(
             await smtp_client._ehlo_or_helo_if_needed()
 
 
+async def test_execute_commands_ok(
+    smtp_client: SMTP,
+    smtpd_server: asyncio.AbstractServer,
+    received_commands: List[Tuple[str, Tuple[Any, ...]]],
+) -> None:
+    async with smtp_client:
+        await smtp_client.ehlo()
+        responses = await smtp_client.execute_commands((b"NOOP",), (b"RSET",))
+
+        assert [response.code for response in responses] == [
+            SMTPStatus.completed,
+            SMTPStatus.completed,
+        ]
+        assert [command[0] for command in received_commands[-2:]] == [
+            "NOOP",
+            "RSET",
+        ]
+
+
 async def test_rset_ok(smtp_client: SMTP, smtpd_server: asyncio.AbstractServer) -> None:
     async with smtp_client:
         response = await smtp_client.rset()
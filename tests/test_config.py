@@ -5,9 +5,11 @@ Tests covering SMTP configuration options.
 import asyncio
 import socket
 import ssl
+from typing import List
 
 import pytest
 
+import aiosmtplib.smtp
 from aiosmtplib import SMTP
 
 
@@ -339,3 +341,23 @@ async def test_local_hostname_newline_raises_error() -> None:
             hostname="localhost",
             local_hostname="localhost\r\nRCPT TO: <hacker@hackers.org>",
         )
+
+
+async def test_default_local_hostname_looked_up_once(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    calls: List[str] = []
+
+    def mock_getfqdn() -> str:
+        calls.append("getfqdn")
+        return "mail.example.com"
+
+    monkeypatch.setattr(socket, "getfqdn", mock_getfqdn)
+    aiosmtplib.smtp._get_fqdn.cache_clear()
+    try:
+        assert SMTP().local_hostname == "mail.example.com"
+        assert SMTP().local_hostname == "mail.example.com"
+    finally:
+        aiosmtplib.smtp._get_fqdn.cache_clear()
+
+    assert len(calls) == 1
@@ -43,6 +43,16 @@ async def test_plain_smtp_connect(
     assert not smtp_client.is_connected
 
 
+async def test_connect_sets_socket_options(
+    smtp_client: SMTP, smtpd_server: asyncio.AbstractServer
+) -> None:
+    async with smtp_client:
+        transport_socket = smtp_client.get_transport_info("socket")
+
+        assert transport_socket.getsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE)
+        assert transport_socket.getsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY)
+
+
 async def test_quit_then_connect_ok(
     smtp_client: SMTP, smtpd_server: asyncio.AbstractServer
 ) -> None:
@@ -279,6 +289,21 @@ async def test_context_manager_exception_quits(
     assert received_commands[-1][0] == "QUIT"
 
 
+async def test_context_manager_quit_timeout_closes(
+    smtp_client: SMTP,
+    smtpd_server: asyncio.AbstractServer,
+    smtpd_class: Type[SMTPD],
+    smtpd_mock_response_delayed_ok: Callable,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setattr(smtpd_class, "smtp_QUIT", smtpd_mock_response_delayed_ok)
+
+    async with smtp_client:
+        smtp_client.timeout = 0.1
+
+    assert not smtp_client.is_connected
+
+
 async def test_context_manager_connect_exception_closes(
     smtp_client: SMTP,
     smtpd_server: asyncio.AbstractServer,
@@ -5,6 +5,8 @@ Test message and address parsing/formatting functions.
 from email.header import Header
 from email.headerregistry import Address
 from email.message import EmailMessage, Message
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
 from typing import List, Union
 
 import pytest
@@ -87,6 +89,24 @@ This is a test\r
     assert flat_message == expected_message
 
 
+def test_flatten_compat32_message() -> None:
+    message = Message()
+    message["To"] = "bob@example.com"
+    message["Subject"] = "Hello, World."
+    message["From"] = "alice@example.com"
+    message.set_payload("This is a test\nwith two lines")
+
+    flat_message = flatten_message(message)
+
+    expected_message = b"""To: bob@example.com\r
+Subject: Hello, World.\r
+From: alice@example.com\r
+\r
+This is a test\r
+with two lines"""
+    assert flat_message == expected_message
+
+
 @pytest.mark.parametrize(
     "utf8, cte_type, expected_chunk",
     (
@@ -117,6 +137,26 @@ def test_flatten_message_removes_bcc_from_message_text() -> None:
     assert flat_message == b"\r\n"  # empty message
 
 
+def test_flatten_message_does_not_modify_original() -> None:
+    message = EmailMessage()
+    message["To"] = "bob@example.com"
+    message["Bcc"] = "alice@example.com"
+    message["Resent-Bcc"] = "claire@example.com"
+
+    flatten_message(message)
+
+    assert message.keys() == ["To", "Bcc", "Resent-Bcc"]
+
+    # Without any Bcc headers to remove, the boundary still isn't set
+    multipart_message = MIMEMultipart()
+    multipart_message["To"] = "bob@example.com"
+    multipart_message.attach(MIMEText("Hello"))
+
+    flatten_message(multipart_message)
+
+    assert multipart_message.get_boundary() is None
+
+
 def test_flatten_resent_message() -> None:
     message = EmailMessage()
     message["To"] = "bob@example.com"
@@ -0,0 +1,407 @@
+"""
+Connection pool tests.
+"""
+
+import asyncio
+import email.message
+from typing import Any, Callable, Coroutine, Dict, List, Tuple, Type
+
+import pytest
+from aiosmtpd.smtp import SMTP as SMTPD
+
+from aiosmtplib import (
+    SMTPPool,
+    SMTPRecipientsRefused,
+    SMTPStatus,
+    SMTPTimeoutError,
+    sendmail_parallel,
+)
+
+
+pytestmark = pytest.mark.asyncio()
+
+
+def _command_names(received_commands: List[Tuple[str, Tuple[Any, ...]]]) -> List[str]:
+    return [command[0] for command in received_commands]
+
+
+async def test_pool_sendmail_reuses_connection(
+    hostname: str,
+    smtpd_server_port: int,
+    sender_str: str,
+    recipient_str: str,
+    message_str: str,
+    received_messages: List[email.message.EmailMessage],
+    received_commands: List[Tuple[str, Tuple[Any, ...]]],
+) -> None:
+    async with SMTPPool(
+        hostname=hostname, port=smtpd_server_port, start_tls=False
+    ) as pool:
+        for _ in range(3):
+            errors, response = await pool.sendmail(
+                sender_str, [recipient_str], message_str
+            )
+            assert not errors
+            assert pool.idle_connections == 1
+
+    assert pool.idle_connections == 0
+    assert len(received_messages) == 3
+    assert _command_names(received_commands).count("EHLO") == 1
+    assert _command_names(received_commands)[-1] == "QUIT"
+
+
+async def test_pool_send_message(
+    hostname: str,
+    smtpd_server_port: int,
+    message: email.message.Message,
+    received_messages: List[email.message.EmailMessage],
+) -> None:
+    async with SMTPPool(
+        hostname=hostname, port=smtpd_server_port, start_tls=False
+    ) as pool:
+        errors, response = await pool.send_message(message)
+
+    assert not errors
+    assert len(received_messages) == 1
+
+
+async def test_pool_send_messages(
+    hostname: str,
+    smtpd_server_port: int,
+    received_messages: List[email.message.EmailMessage],
+    received_commands: List[Tuple[str, Tuple[Any, ...]]],
+) -> None:
+    messages: List[email.message.EmailMessage] = []
+    for recipient in ("one@example.com", ">not an addr<", "three@example.com"):
+        message = email.message.EmailMessage()
+        message["From"] = "sender@example.com"
+        message["To"] = recipient
+        message.set_content("Hello")
+        messages.append(message)
+
+    async with SMTPPool(
+        hostname=hostname, port=smtpd_server_port, start_tls=False
+    ) as pool:
+        results = await pool.send_messages(messages)
+
+        assert pool.idle_connections == 1
+
+    assert isinstance(results[0], tuple)
+    assert isinstance(results[1], SMTPRecipientsRefused)
+    assert isinstance(results[2], tuple)
+    assert len(received_messages) == 2
+    assert _command_names(received_commands).count("EHLO") == 1
+
+
+async def test_pool_send_messages_invalid_message(
+    hostname: str,
+    smtpd_server_port: int,
+    received_messages: List[email.message.EmailMessage],
+    received_commands: List[Tuple[str, Tuple[Any, ...]]],
+) -> None:
+    messages: List[email.message.EmailMessage] = []
+    for recipient in ("one@example.com", None, "three@example.com"):
+        message = email.message.EmailMessage()
+        message["From"] = "sender@example.com"
+        if recipient is not None:
+            message["To"] = recipient
+        message.set_content("Hello")
+        messages.append(message)
+
+    async with SMTPPool(
+        hostname=hostname, port=smtpd_server_port, start_tls=False
+    ) as pool:
+        results = await pool.send_messages(messages)
+
+    assert isinstance(results[0], tuple)
+    assert isinstance(results[1], ValueError)
+    assert isinstance(results[2], tuple)
+    assert len(received_messages) == 2
+    # Nothing was sent for the invalid message, so there was nothing to reset
+    assert "RSET" not in _command_names(received_commands)
+
+
+async def test_pool_max_messages_per_connection(
+    hostname: str,
+    smtpd_server_port: int,
+    sender_str: str,
+    recipient_str: str,
+    message_str: str,
+    received_commands: List[Tuple[str, Tuple[Any, ...]]],
+) -> None:
+    async with SMTPPool(
+        hostname=hostname,
+        port=smtpd_server_port,
+        start_tls=False,
+        max_messages_per_connection=2,
+    ) as pool:
+        for _ in range(4):
+            await pool.sendmail(sender_str, [recipient_str], message_str)
+
+    assert _command_names(received_commands).count("EHLO") == 2
+    assert _command_names(received_commands).count("QUIT") == 2
+
+
+async def test_pool_max_connections(
+    hostname: str,
+    smtpd_server_port: int,
+    sender_str: str,
+    recipient_str: str,
+    message_str: str,
+    received_messages: List[email.message.EmailMessage],
+) -> None:
+    async with SMTPPool(
+        hostname=hostname, port=smtpd_server_port, start_tls=False, max_connections=2
+    ) as pool:
+        await asyncio.gather(
+            *[pool.sendmail(sender_str, [recipient_str], message_str) for _ in range(5)]
+        )
+
+        assert pool.idle_connections == 2
+
+    assert len(received_messages) == 5
+
+
+async def test_pool_replaces_disconnected_client(
+    hostname: str,
+    smtpd_server_port: int,
+    received_commands: List[Tuple[str, Tuple[Any, ...]]],
+) -> None:
+    async with SMTPPool(
+        hostname=hostname, port=smtpd_server_port, start_tls=False
+    ) as pool:
+        async with pool.acquire() as client:
+            await client.noop()
+            first_client = client
+
+        first_client.close()
+
+        async with pool.acquire() as client:
+            assert client is not first_client
+            assert client.is_connected
+
+
+async def test_pool_checks_idle_connection(
+    hostname: str,
+    smtpd_server_port: int,
+    received_commands: List[Tuple[str, Tuple[Any, ...]]],
+) -> None:
+    async with SMTPPool(
+        hostname=hostname,
+        port=smtpd_server_port,
+        start_tls=False,
+        idle_check_after=0.0,
+    ) as pool:
+        async with pool.acquire() as client:
+            first_client = client
+
+        await asyncio.sleep(0.01)
+
+        async with pool.acquire() as client:
+            assert client is first_client
+
+    assert "NOOP" in _command_names(received_commands)
+
+
+async def test_pool_resets_envelope_after_error(
+    hostname: str,
+    smtpd_server_port: int,
+    sender_str: str,
+    message_str: str,
+    received_commands: List[Tuple[str, Tuple[Any, ...]]],
+    smtpd_class: Type[SMTPD],
+    smtpd_mock_response_error_with_code_factory: Callable[
+        [str], Callable[[SMTPD], Coroutine[Any, Any, None]]
+    ],
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setattr(
+        smtpd_class,
+        "smtp_RCPT",
+        smtpd_mock_response_error_with_code_factory(
+            str(SMTPStatus.mailbox_unavailable)
+        ),
+    )
+
+    async with SMTPPool(
+        hostname=hostname, port=smtpd_server_port, start_tls=False
+    ) as pool:
+        with pytest.raises(SMTPRecipientsRefused):
+            await pool.sendmail(sender_str, ["bad@example.com"], message_str)
+
+        assert pool.idle_connections == 1
+
+    # sendmail resets the envelope itself; the pool doesn't send another RSET
+    assert _command_names(received_commands).count("RSET") == 1
+
+
+async def test_pool_acquire_resets_envelope_after_error(
+    hostname: str,
+    smtpd_server_port: int,
+    sender_str: str,
+    received_commands: List[Tuple[str, Tuple[Any, ...]]],
+) -> None:
+    async with SMTPPool(
+        hostname=hostname, port=smtpd_server_port, start_tls=False
+    ) as pool:
+        with pytest.raises(ValueError):
+            async with pool.acquire() as client:
+                await client.mail(sender_str)
+                raise ValueError("Failed")
+
+        assert pool.idle_connections == 1
+
+    assert _command_names(received_commands).count("RSET") == 1
+
+
+async def test_pool_discards_client_after_timeout(
+    hostname: str,
+    smtpd_server_port: int,
+    sender_str: str,
+    recipient_str: str,
+    message_str: str,
+    received_messages: List[email.message.EmailMessage],
+    received_commands: List[Tuple[str, Tuple[Any, ...]]],
+    smtpd_class: Type[SMTPD],
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    async def mock_response_late_ok(smtpd: SMTPD, *args: Any, **kwargs: Any) -> None:
+        await asyncio.sleep(0.2)
+        await smtpd.push("250 all done")
+
+    monkeypatch.setattr(smtpd_class, "smtp_MAIL", mock_response_late_ok)
+
+    async with SMTPPool(
+        hostname=hostname, port=smtpd_server_port, start_tls=False
+    ) as pool:
+        with pytest.raises(SMTPTimeoutError):
+            async with pool.acquire() as client:
+                first_client = client
+                await client.sendmail(
+                    sender_str, [recipient_str], message_str, timeout=0.05
+                )
+
+        assert pool.idle_connections == 0
+        assert not first_client.is_connected
+
+        # Let the server send its late reply before trying again
+        await asyncio.sleep(0.3)
+        monkeypatch.undo()
+
+        async with pool.acquire() as client:
+            assert client is not first_client
+            errors, _ = await client.sendmail(sender_str, [recipient_str], message_str)
+
+    assert not errors
+    assert len(received_messages) == 1
+    assert "RSET" not in _command_names(received_commands)
+
+
+async def test_pool_discards_client_on_cancel(
+    hostname: str,
+    smtpd_server_port: int,
+) -> None:
+    async with SMTPPool(
+        hostname=hostname, port=smtpd_server_port, start_tls=False
+    ) as pool:
+        with pytest.raises(asyncio.CancelledError):
+            async with pool.acquire():
+                raise asyncio.CancelledError()
+
+        assert pool.idle_connections == 0
+
+
+@pytest.mark.parametrize(
+    "kwargs",
+    (
+        {"max_connections": 0},
+        {"max_messages_per_connection": 0},
+        {"use_tls": True, "start_tls": True},
+    ),
+    ids=("max_connections", "max_messages_per_connection", "smtp_options"),
+)
+async def test_pool_invalid_options(kwargs: Dict[str, Any]) -> None:
+    with pytest.raises(ValueError):
+        SMTPPool(**kwargs)
+
+
+async def test_sendmail_parallel(
+    hostname: str,
+    smtpd_server_port: int,
+    sender_str: str,
+    message_str: str,
+    received_messages: List[email.message.EmailMessage],
+) -> None:
+    async with SMTPPool(
+        hostname=hostname, port=smtpd_server_port, start_tls=False
+    ) as first_pool, SMTPPool(
+        hostname=hostname, port=smtpd_server_port, start_tls=False
+    ) as second_pool:
+        results = await sendmail_parallel(
+            sender_str,
+            {"first": ["a@example.com"], "second": ["b@example.com", "c@example.com"]},
+            message_str,
+            pools={"first": first_pool, "second": second_pool},
+        )
+
+    assert set(results) == {"first", "second"}
+    for result in results.values():
+        assert isinstance(result, tuple)
+        errors, _ = result
+        assert not errors
+    assert len(received_messages) == 2
+
+
+async def test_sendmail_parallel_returns_exceptions(
+    hostname: str,
+    smtpd_server_port: int,
+    sender_str: str,
+    message_str: str,
+    received_messages: List[email.message.EmailMessage],
+    smtpd_class: Type[SMTPD],
+    smtpd_mock_response_error_with_code_factory: Callable[
+        [str], Callable[[SMTPD], Coroutine[Any, Any, None]]
+    ],
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setattr(
+        smtpd_class,
+        "smtp_RCPT",
+        smtpd_mock_response_error_with_code_factory(
+            str(SMTPStatus.mailbox_unavailable)
+        ),
+    )
+
+    async with SMTPPool(
+        hostname=hostname, port=smtpd_server_port, start_tls=False
+    ) as pool:
+        results = await sendmail_parallel(
+            sender_str,
+            {"host": ["bad@example.com"]},
+            message_str,
+            pools={"host": pool},
+        )
+
+    assert isinstance(results["host"], SMTPRecipientsRefused)
+    assert not received_messages
+
+
+async def test_sendmail_parallel_missing_pool(
+    hostname: str,
+    smtpd_server_port: int,
+    sender_str: str,
+    message_str: str,
+    received_messages: List[email.message.EmailMessage],
+) -> None:
+    async with SMTPPool(
+        hostname=hostname, port=smtpd_server_port, start_tls=False
+    ) as pool:
+        with pytest.raises(KeyError):
+            await sendmail_parallel(
+                sender_str,
+                {"first": ["a@example.com"], "second": ["b@example.com"]},
+                message_str,
+                pools={"first": pool},
+            )
+
+    assert not received_messages
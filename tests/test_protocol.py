@@ -9,7 +9,7 @@ import ssl
 
 import pytest
 
-from aiosmtplib import SMTPResponseException, SMTPServerDisconnected
+from aiosmtplib import SMTPResponseException, SMTPServerDisconnected, SMTPStatus
 from aiosmtplib.protocol import FlowControlMixin, SMTPProtocol
 
 from .compat import cleanup_server
@@ -31,6 +31,28 @@ async def test_protocol_connect(hostname: str, echo_server_port: int) -> None:
     transport.close()
 
 
+async def test_protocol_last_response_time(
+    hostname: str, smtpd_server_port: int
+) -> None:
+    event_loop = asyncio.get_running_loop()
+    connect_future = event_loop.create_connection(
+        SMTPProtocol, host=hostname, port=smtpd_server_port
+    )
+    transport, protocol = await asyncio.wait_for(connect_future, timeout=1.0)
+
+    await protocol.read_response(timeout=1.0)
+    greeting_time = protocol.last_response_time
+
+    assert greeting_time is not None
+
+    await protocol.execute_command(b"NOOP", timeout=1.0)
+
+    assert protocol.last_response_time is not None
+    assert protocol.last_response_time >= greeting_time
+
+    transport.close()
+
+
 async def test_protocol_read_limit_overrun(
     bind_address: str,
     hostname: str,
@@ -201,6 +223,177 @@ async def test_protocol_data_received_called_twice(
     await cleanup_server(server)
 
 
+async def test_protocol_multiline_response(
+    bind_address: str,
+    hostname: str,
+) -> None:
+    event_loop = asyncio.get_running_loop()
+
+    async def client_connected(
+        reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        await reader.read(1000)
+        writer.write(b"250-first\r\n250-sec")
+        await writer.drain()
+        await asyncio.sleep(0.01)
+        writer.write(b"ond\r\n250 third\r\n")
+        await writer.drain()
+
+    server = await asyncio.start_server(
+        client_connected, host=bind_address, port=0, family=socket.AF_INET
+    )
+    server_port = server.sockets[0].getsockname()[1] if server.sockets else 0
+
+    connect_future = event_loop.create_connection(
+        SMTPProtocol, host=hostname, port=server_port
+    )
+
+    _, protocol = await asyncio.wait_for(connect_future, timeout=1.0)
+
+    response = await protocol.execute_command(b"TEST\n", timeout=1.0)  # type: ignore
+
+    assert response.code == 250
+    assert response.message == "first\nsecond\nthird"
+
+    server.close()
+    await cleanup_server(server)
+
+
+async def test_protocol_malformed_response(
+    bind_address: str,
+    hostname: str,
+) -> None:
+    event_loop = asyncio.get_running_loop()
+
+    async def client_connected(
+        reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        await reader.read(1000)
+        writer.write(b"250-first\r\nnot a response\r\n")
+        await writer.drain()
+
+    server = await asyncio.start_server(
+        client_connected, host=bind_address, port=0, family=socket.AF_INET
+    )
+    server_port = server.sockets[0].getsockname()[1] if server.sockets else 0
+
+    connect_future = event_loop.create_connection(
+        SMTPProtocol, host=hostname, port=server_port
+    )
+
+    _, protocol = await asyncio.wait_for(connect_future, timeout=1.0)
+
+    with pytest.raises(SMTPResponseException) as exc_info:
+        await protocol.execute_command(b"TEST\n", timeout=1.0)  # type: ignore
+
+    assert exc_info.value.code == SMTPStatus.invalid_response
+    assert "Malformed SMTP response line" in exc_info.value.message
+
+    server.close()
+    await cleanup_server(server)
+
+
+async def test_protocol_execute_commands(
+    bind_address: str,
+    hostname: str,
+) -> None:
+    event_loop = asyncio.get_running_loop()
+    received_data = bytearray()
+
+    async def client_connected(
+        reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        while received_data.count(b"\r\n") < 3:
+            received_data.extend(await reader.read(1000))
+        writer.write(b"250 one\r\n250-two\r\n250 three\r\n550 four\r\n")
+        await writer.drain()
+
+    server = await asyncio.start_server(
+        client_connected, host=bind_address, port=0, family=socket.AF_INET
+    )
+    server_port = server.sockets[0].getsockname()[1] if server.sockets else 0
+
+    connect_future = event_loop.create_connection(
+        SMTPProtocol, host=hostname, port=server_port
+    )
+
+    _, protocol = await asyncio.wait_for(connect_future, timeout=1.0)
+
+    responses = await protocol.execute_commands(  # type: ignore
+        (b"MAIL", b"FROM:<a@example.com>"),
+        (b"RCPT", b"TO:<b@example.com>"),
+        (b"RCPT", b"TO:<c@example.com>"),
+        timeout=1.0,
+    )
+
+    assert received_data == (
+        b"MAIL FROM:<a@example.com>\r\n"
+        b"RCPT TO:<b@example.com>\r\n"
+        b"RCPT TO:<c@example.com>\r\n"
+    )
+    assert [(response.code, response.message) for response in responses] == [
+        (250, "one"),
+        (250, "two\nthree"),
+        (550, "four"),
+    ]
+
+    server.close()
+    await cleanup_server(server)
+
+
+async def test_protocol_pipelined_data_sender_refused(
+    bind_address: str,
+    hostname: str,
+) -> None:
+    event_loop = asyncio.get_running_loop()
+    received_data = bytearray()
+
+    async def client_connected(
+        reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        while received_data.count(b"\r\n") < 3:
+            received_data.extend(await reader.read(1000))
+        writer.write(b"550 no sender\r\n250 ok\r\n354 go ahead\r\n")
+        await writer.drain()
+        while not received_data.endswith(b"\r\n.\r\n"):
+            received_data.extend(await reader.read(1000))
+        writer.write(b"554 no valid sender\r\n")
+        await writer.drain()
+
+    server = await asyncio.start_server(
+        client_connected, host=bind_address, port=0, family=socket.AF_INET
+    )
+    server_port = server.sockets[0].getsockname()[1] if server.sockets else 0
+
+    connect_future = event_loop.create_connection(
+        SMTPProtocol, host=hostname, port=server_port
+    )
+
+    _, protocol = await asyncio.wait_for(connect_future, timeout=1.0)
+
+    (
+        mail_response,
+        rcpt_responses,
+        data_response,
+    ) = await protocol.execute_pipelined_data_command(  # type: ignore
+        b"Hello World\r\n",
+        (b"MAIL", b"FROM:<a@example.com>"),
+        ((b"RCPT", b"TO:<b@example.com>"),),
+        timeout=1.0,
+    )
+
+    # The message content isn't sent without a valid sender
+    assert received_data == (
+        b"MAIL FROM:<a@example.com>\r\nRCPT TO:<b@example.com>\r\nDATA\r\n.\r\n"
+    )
+    assert mail_response.code == 550
+    assert [response.code for response in rcpt_responses] == [250]
+    assert data_response.code == 554
+
+    server.close()
+    await cleanup_server(server)
+
+
 async def test_protocol_eof_response(bind_address: str, hostname: str) -> None:
     event_loop = asyncio.get_running_loop()
 
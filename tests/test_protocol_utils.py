@@ -0,0 +1,27 @@
+"""
+Tests for message data preparation in the protocol.
+"""
+
+import pytest
+
+from aiosmtplib.protocol import SMTPProtocol
+
+
+@pytest.mark.parametrize(
+    "message,expected,expected_end",
+    [
+        (b"a\r\nb\r\n", b"a\r\nb\r\n", b".\r\n"),
+        (b"a\nb\n", b"a\r\nb\r\n", b".\r\n"),
+        (b"a\rb\r", b"a\r\nb\r\n", b".\r\n"),
+        (b"a\r\r\nb\n\r", b"a\r\n\r\nb\r\n\r\n", b".\r\n"),
+        (b".a\n.b\n", b"..a\r\n..b\r\n", b".\r\n"),
+        (b"a.\nb.c\n", b"a.\r\nb.c\r\n", b".\r\n"),
+        (b"a\nb", b"a\r\nb", b"\r\n.\r\n"),
+    ],
+    ids=["crlf", "lf", "cr", "mixed", "periods", "inner periods", "no final newline"],
+)
+def test_prepare_data(message: bytes, expected: bytes, expected_end: bytes) -> None:
+    prepared, data_end = SMTPProtocol._prepare_data(message)
+
+    assert prepared == expected
+    assert data_end == expected_end
@@ -7,6 +7,8 @@ import copy
 import email.generator
 import email.header
 import email.message
+import gc
+import socket
 from typing import Any, Callable, Coroutine, List, Tuple, Type
 
 import pytest
@@ -17,9 +19,12 @@ from aiosmtplib import (
     SMTPNotSupported,
     SMTPRecipientsRefused,
     SMTPResponseException,
+    SMTPSenderRefused,
     SMTPStatus,
 )
 
+from .compat import cleanup_server
+
 
 pytestmark = pytest.mark.asyncio()
 
@@ -90,6 +95,38 @@ async def test_sendmail_with_mail_option(
         assert response != ""
 
 
+async def test_sendmail_does_not_modify_mail_options(
+    smtp_client: SMTP,
+    smtpd_server: asyncio.AbstractServer,
+    sender_str: str,
+    recipient_str: str,
+    message_str: str,
+) -> None:
+    mail_options = ["BODY=8BITMIME"]
+
+    async with smtp_client:
+        for _ in range(2):
+            await smtp_client.sendmail(
+                sender_str, [recipient_str], message_str, mail_options=mail_options
+            )
+
+    assert mail_options == ["BODY=8BITMIME"]
+
+
+async def test_sendmail_non_ascii_str_raises_before_mail(
+    smtp_client: SMTP,
+    smtpd_server: asyncio.AbstractServer,
+    sender_str: str,
+    recipient_str: str,
+    received_commands: List[Tuple[str, Tuple[Any, ...]]],
+) -> None:
+    async with smtp_client:
+        with pytest.raises(UnicodeEncodeError):
+            await smtp_client.sendmail(sender_str, [recipient_str], "Hé")
+
+        assert "MAIL" not in [command[0] for command in received_commands]
+
+
 async def test_sendmail_without_size_option(
     smtp_client: SMTP,
     smtpd_server: asyncio.AbstractServer,
@@ -251,6 +288,122 @@ async def test_rset_after_sendmail_error_response_to_data(
         assert received_commands[-1][0] == "RSET"
 
 
+async def test_sendmail_pipelined(
+    smtp_client: SMTP,
+    smtpd_server: asyncio.AbstractServer,
+    sender_str: str,
+    recipient_str: str,
+    message_str: str,
+    received_commands: List[Tuple[str, Tuple[Any, ...]]],
+    received_messages: List[email.message.EmailMessage],
+) -> None:
+    async with smtp_client:
+        await smtp_client.ehlo()
+        smtp_client.esmtp_extensions["pipelining"] = ""
+
+        errors, response = await smtp_client.sendmail(
+            sender_str, [recipient_str, ">not an addr<"], message_str
+        )
+
+        assert list(errors) == [">not an addr<"]
+        assert errors[">not an addr<"].code == SMTPStatus.unrecognized_parameters
+        assert response != ""
+        assert [command[0] for command in received_commands[-3:]] == [
+            "MAIL",
+            "RCPT",
+            "DATA",
+        ]
+        assert len(received_messages) == 1
+
+
+async def test_sendmail_pipelined_sender_refused(
+    smtp_client: SMTP,
+    smtpd_server: asyncio.AbstractServer,
+    recipient_str: str,
+    received_commands: List[Tuple[str, Tuple[Any, ...]]],
+    received_messages: List[email.message.EmailMessage],
+) -> None:
+    async with smtp_client:
+        await smtp_client.ehlo()
+        smtp_client.esmtp_extensions["pipelining"] = ""
+
+        with pytest.raises(SMTPSenderRefused) as excinfo:
+            await smtp_client.sendmail(">foobar<", [recipient_str], "Hello World")
+
+        assert excinfo.value.code == SMTPStatus.unrecognized_parameters
+        assert received_commands[-1][0] == "RSET"
+        assert not received_messages
+
+
+async def test_sendmail_pipelined_all_recipients_refused(
+    smtp_client: SMTP,
+    smtpd_server: asyncio.AbstractServer,
+    sender_str: str,
+    received_commands: List[Tuple[str, Tuple[Any, ...]]],
+    received_messages: List[email.message.EmailMessage],
+) -> None:
+    async with smtp_client:
+        await smtp_client.ehlo()
+        smtp_client.esmtp_extensions["pipelining"] = ""
+
+        with pytest.raises(SMTPRecipientsRefused) as excinfo:
+            await smtp_client.sendmail(
+                sender_str, [">not an addr<", ">also not<"], "Hello World"
+            )
+
+        assert len(excinfo.value.recipients) == 2
+        assert received_commands[-1][0] == "RSET"
+        assert not received_messages
+
+        # The connection is still usable afterwards
+        response = await smtp_client.noop()
+        assert response.code == SMTPStatus.completed
+
+
+async def test_sendmail_pipelined_domain_unavailable(
+    caplog: pytest.LogCaptureFixture,
+    bind_address: str,
+    hostname: str,
+    sender_str: str,
+    recipient_str: str,
+    message_str: str,
+) -> None:
+    async def client_connected(
+        reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        writer.write(b"220 Hi\r\n")
+        await reader.readline()
+        writer.write(b"250-localhost\r\n250 PIPELINING\r\n")
+        # MAIL, RCPT and DATA arrive together; refuse them all and disconnect
+        for _ in range(3):
+            await reader.readline()
+        writer.write(b"421 Shutting down\r\n")
+        await writer.drain()
+        writer.close()
+
+    server = await asyncio.start_server(
+        client_connected, host=bind_address, port=0, family=socket.AF_INET
+    )
+    server_port = server.sockets[0].getsockname()[1] if server.sockets else 0
+
+    smtp_client = SMTP(hostname=hostname, port=server_port, start_tls=False)
+    await smtp_client.connect()
+
+    with pytest.raises(SMTPSenderRefused) as excinfo:
+        await smtp_client.sendmail(sender_str, [recipient_str], message_str)
+
+    assert excinfo.value.code == SMTPStatus.domain_unavailable
+    assert not smtp_client.is_connected
+
+    gc.collect()
+    await asyncio.sleep(0)
+
+    server.close()
+    await cleanup_server(server)
+
+    assert "Future exception was never retrieved" not in caplog.text
+
+
 async def test_send_message(
     smtp_client: SMTP,
     smtpd_server: asyncio.AbstractServer,
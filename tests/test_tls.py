@@ -4,6 +4,7 @@ TLS and STARTTLS handling.
 
 import asyncio
 import copy
+import os
 import ssl
 from typing import Callable, Type
 
@@ -17,7 +18,9 @@ from aiosmtplib import (
     SMTPResponseException,
     SMTPServerDisconnected,
     SMTPStatus,
+    clear_tls_context_cache,
 )
+from aiosmtplib.smtp import _tls_context_cache
 
 
 pytestmark = pytest.mark.asyncio()
@@ -306,6 +309,19 @@ async def test_starttls_already_upgraded_error(
             await smtp_client.starttls()
 
 
+async def test_starttls_protocol_already_upgraded_error(
+    smtp_client: SMTP,
+    smtpd_server: asyncio.AbstractServer,
+    client_tls_context: ssl.SSLContext,
+) -> None:
+    async with smtp_client:
+        await smtp_client.starttls()
+
+        assert smtp_client.protocol is not None
+        with pytest.raises(RuntimeError, match="Already using TLS"):
+            await smtp_client.protocol.start_tls(client_tls_context)
+
+
 async def test_starttls_cert_no_validate(
     smtpd_server: asyncio.AbstractServer,
     hostname: str,
@@ -411,3 +427,62 @@ async def test_tls_connection_with_cert_error(
         await smtp_client_tls.connect()
 
     assert "CERTIFICATE" in str(exception_info.value).upper()
+
+
+async def test_default_tls_context_is_reused(
+    hostname: str,
+    ca_cert_path: str,
+    valid_cert_path: str,
+    valid_key_path: str,
+) -> None:
+    options = {
+        "hostname": hostname,
+        "client_cert": valid_cert_path,
+        "client_key": valid_key_path,
+        "cert_bundle": ca_cert_path,
+    }
+    context = SMTP(**options)._get_tls_context()
+
+    assert SMTP(**options)._get_tls_context() is context
+    assert SMTP(**options, validate_certs=False)._get_tls_context() is not context
+
+
+async def test_default_tls_context_rebuilt_when_cert_changes(
+    hostname: str,
+    ca_cert_path: str,
+    valid_cert_path: str,
+    valid_key_path: str,
+) -> None:
+    options = {
+        "hostname": hostname,
+        "client_cert": valid_cert_path,
+        "client_key": valid_key_path,
+        "cert_bundle": ca_cert_path,
+    }
+    context = SMTP(**options)._get_tls_context()
+
+    stat = os.stat(valid_cert_path)
+    os.utime(valid_cert_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+    assert SMTP(**options)._get_tls_context() is not context
+
+
+async def test_clear_tls_context_cache(hostname: str) -> None:
+    context = SMTP(hostname=hostname)._get_tls_context()
+
+    clear_tls_context_cache()
+
+    assert SMTP(hostname=hostname)._get_tls_context() is not context
+
+
+async def test_tls_context_cache_size(
+    hostname: str, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr("aiosmtplib.smtp.TLS_CONTEXT_CACHE_SIZE", 1)
+    clear_tls_context_cache()
+
+    context = SMTP(hostname=hostname)._get_tls_context()
+    SMTP(hostname=hostname, validate_certs=False)._get_tls_context()
+
+    assert len(_tls_context_cache) == 1
+    assert SMTP(hostname=hostname)._get_tls_context() is not context